@@ -34,6 +34,9 @@ env = environ.Env(
     DB_PASS=(str, "<NOT_SET>"),
     DB_HOST=(str, "localhost"),
     DB_PORT=(str, "5432"),
+    STATELESS_API=(bool, True),
+    SESSION_BACKEND=(str, "db"),
+    CACHE_URL=(str, "locmemcache://"),
 )
 environ.Env.read_env(env.str("ENV_PATH", DEFAULT_ENV_FILE))  # Reading .env file
 ENV_VARS = env
@@ -71,26 +74,69 @@ INSTALLED_APPS = [
 ]
 
 
-MIDDLEWARE = [
-    # Default Django provided middlewares
-    "django.middleware.security.SecurityMiddleware",
+# Requests under these prefixes skip `STATEFUL_MIDDLEWARE` (see foundation.middleware).
+# Set STATELESS_API=false to get sessions (and the browsable API login) back on `/api/`.
+STATELESS_API = env("STATELESS_API")
+STATELESS_PATH_PREFIXES = ("/api/", "/healthz", "/readyz") if STATELESS_API else ()
+
+
+STATEFUL_MIDDLEWARE = [
     "django.contrib.sessions.middleware.SessionMiddleware",
-    "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
-    "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    # Manually added middlewares
+]
+
+
+MIDDLEWARE = [
+    # Outermost, so responses short-circuited below (e.g. load shedding 503s) still get CORS headers
     "corsheaders.middleware.CorsMiddleware",
+    # Rejects requests with a 503 when the worker is overloaded (early, so rejecting is cheap)
+    "foundation.middleware.AdmissionControlMiddleware",
+    # Default Django provided middlewares
+    "django.middleware.security.SecurityMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    # Session, CSRF, auth and messages middlewares (skipped for `STATELESS_PATH_PREFIXES`)
+    "foundation.middleware.StatefulPathsMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
 
+# Load shedding thresholds, per worker (see foundation.middleware.AdmissionControlMiddleware)
+ADMISSION_CONTROL = {
+    "MAX_IN_FLIGHT": env.int("ADMISSION_MAX_IN_FLIGHT", 32),
+    "MAX_QUEUE_WAIT": env.float("ADMISSION_MAX_QUEUE_WAIT", 5.0),  # seconds
+    "MAX_DB_LATENCY": env.float("ADMISSION_MAX_DB_LATENCY", 0.5),  # seconds, median query time
+    "DB_LATENCY_WINDOW": 10,  # seconds
+    "MIN_DB_LATENCY_SAMPLES": 20,
+    "RETRY_AFTER": 1,  # seconds
+    "EXEMPT_PATHS": ("/healthz", "/readyz"),
+}
+
+
+# Seconds a `/readyz` DB check result is reused for
+READINESS_CHECK_TTL = 2
+
+
+# The admin's middleware checks only look at `MIDDLEWARE`. While the stateful middlewares run
+# inside `StatefulPathsMiddleware`, foundation.checks applies them to `STATEFUL_MIDDLEWARE` instead.
+SILENCED_SYSTEM_CHECKS = (
+    ["admin.E408", "admin.E409", "admin.E410"]
+    if "foundation.middleware.StatefulPathsMiddleware" in MIDDLEWARE
+    else []
+)
+
+
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-        "rest_framework.authentication.SessionAuthentication",
-        "rest_framework.authentication.BasicAuthentication",
+        ("foundation.authentication.JWTAuthentication",)
+        if STATELESS_API
+        else (
+            "foundation.authentication.JWTAuthentication",
+            "rest_framework.authentication.SessionAuthentication",
+            "rest_framework.authentication.BasicAuthentication",
+        )
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
@@ -99,26 +145,50 @@ REST_FRAMEWORK = {
 SPECTACULAR_SETTINGS = {"TITLE": "DRF Starter Kit API Documentation"}
 
 
+# Access tokens are short-lived, clients get a new pair from `/api/auth/refresh-token`
 SIMPLE_JWT = {
-    "ACCESS_TOKEN_LIFETIME": timedelta(days=30),
-    # "REFRESH_TOKEN_LIFETIME": timedelta(days=30),
+    "ACCESS_TOKEN_LIFETIME": timedelta(minutes=env.int("ACCESS_TOKEN_LIFETIME_MINUTES", 15)),
+    "REFRESH_TOKEN_LIFETIME": timedelta(days=env.int("REFRESH_TOKEN_LIFETIME_DAYS", 30)),
 }
 
 
+# Batch registration (`/api/auth/register-users`). Each worker hashes passwords on its own small
+# thread pool, keep it below the CPUs per worker since gunicorn runs several workers per container.
+REGISTER_USERS_MAX_BATCH_SIZE = env.int("REGISTER_USERS_MAX_BATCH_SIZE", 20)
+PASSWORD_HASHING_THREADS = env.int("PASSWORD_HASHING_THREADS", 2)
+
+
+# Seconds between two syncs of a worker's in-memory revoked token list with the DB, and how far
+# back each sync re-reads, to catch revocations committed late or written by a skewed clock
+TOKEN_REVOCATION_REFRESH_INTERVAL = 5
+TOKEN_REVOCATION_SYNC_MARGIN = 60
+
+
 ROOT_URLCONF = "drf_starter_kit.urls"
 
 
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
-        "DIRS": [BASE_DIR / "templates"],
-        "APP_DIRS": True,
+        # foundation's templates are listed here so they override the admin app's ones
+        "DIRS": [BASE_DIR / "templates", BASE_DIR / "foundation" / "templates"],
         "OPTIONS": {
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "foundation.context_processors.admin_branding",
+            ],
+            # Compiled templates are kept in memory (reset by the autoreloader in development)
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
             ],
         },
     },
@@ -142,6 +212,20 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# e.g. CACHE_URL=redis://localhost:6379/0 to share the cache between workers
+CACHES = {"default": env.cache_url("CACHE_URL")}
+
+
+# Sessions (only used by the admin, the API is stateless)
+# https://docs.djangoproject.com/en/5.1/topics/http/sessions/#configuring-the-session-engine
+# One of "db", "cached_db", "cache", "signed_cookies". "cached_db" and "cache" need a `CACHE_URL`
+# shared by all workers and replicas (checked at startup, see foundation.checks). Expired DB
+# sessions are removed by `python manage.py purge_sessions`.
+SESSION_ENGINE = f"django.contrib.sessions.backends.{env('SESSION_BACKEND')}"
+
+
 AUTH_USER_MODEL = "foundation.User"
 
 
@@ -174,7 +258,15 @@ USE_TZ = True
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.1/howto/static-files/
 STATIC_URL = "static/"
-# STATIC_ROOT = "/app/staticfiles"
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+
+# `collectstatic` writes content-hashed copies plus gzip/brotli variants of every file, which
+# the WhiteNoise WSGI layer (see wsgi.py) serves with far-future cache headers
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
+}
 
 
 # Default primary key field type
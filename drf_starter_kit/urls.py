@@ -29,7 +29,14 @@ auth_url_patterns = [
         views.RegisterUserAPIView.as_view(),
         name="api.register-user",
     ),
+    path(
+        r"register-users",
+        views.RegisterUsersAPIView.as_view(),
+        name="api.register-users",
+    ),
     path(r"login", views.LoginAPIView.as_view(), name="api.login"),
+    path(r"refresh-token", views.RefreshTokenAPIView.as_view(), name="api.refresh-token"),
+    path(r"logout", views.LogoutAPIView.as_view(), name="api.logout"),
 ]
 
 # Api Routes
@@ -42,6 +49,9 @@ api_url_patterns = [
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    # Load balancer probes
+    path("healthz", views.liveness_view, name="healthz"),
+    path("readyz", views.readiness_view, name="readyz"),
     re_path("api/", include(api_url_patterns)),
     # Swagger URLs
     path("schema/", SpectacularAPIView.as_view(), name="schema"),
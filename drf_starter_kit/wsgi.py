@@ -9,8 +9,22 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
+from whitenoise import WhiteNoise
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "drf_starter_kit.settings")
 
-application = get_wsgi_application()
+# Files under STATIC_ROOT are indexed once at startup and answered before Django sees the
+# request, through the server's `wsgi.file_wrapper` (sendfile on gunicorn). Content-hashed
+# names (e.g. base.5af66c1b1797.css) are cached forever by clients.
+application = WhiteNoise(
+    get_wsgi_application(),
+    root=settings.STATIC_ROOT,
+    prefix=settings.STATIC_URL,
+    immutable_file_test=r"\.[0-9a-f]{12}\.\w+$",
+)
+
+from foundation.helpers.templates import precompile_templates  # noqa: E402 (needs apps loaded)
+
+precompile_templates()
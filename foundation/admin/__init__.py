@@ -1 +1,2 @@
 from .user_admin import *
+from .revoked_token_admin import *
@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from foundation import models
+
+
+@admin.register(models.RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    list_display = ("id", "jti", "token_type", "user", "expires_at", "created_at")
+    raw_id_fields = ("user",)
+    search_fields = ["jti", "user__email"]
+    list_filter = ("token_type",)
+    list_per_page = 50
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FoundationConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "foundation"
+
+    def ready(self):
+        from foundation import checks  # noqa: F401 (registers the system checks)
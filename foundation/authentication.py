@@ -0,0 +1,24 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt import authentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from foundation.helpers.token_revocation import revoked_tokens
+
+
+class JWTAuthentication(authentication.JWTAuthentication):
+    "simplejwt's `JWTAuthentication` that also rejects revoked tokens (see `TokenRevocationList`)."
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+
+        if revoked_tokens.is_revoked(token[api_settings.JTI_CLAIM]):
+            raise InvalidToken({"detail": "Token has been revoked.", "code": "token_revoked"})
+
+        return token
+
+
+class JWTAuthenticationScheme(SimpleJWTScheme):
+    "Documents `JWTAuthentication` as the Bearer scheme in Swagger, like simplejwt's own class."
+
+    target_class = "foundation.authentication.JWTAuthentication"
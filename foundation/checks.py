@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core import checks
+from django.utils.module_loading import import_string
+
+
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@checks.register(checks.Tags.caches)
+def check_session_cache(app_configs, **kwargs):
+    """
+    Cache backed sessions must live in a cache every worker and replica shares. With a per-process
+    cache, a session ended on one worker (logout, password change, purge) stays valid on the others.
+    """
+
+    if settings.SESSION_ENGINE not in (
+        "django.contrib.sessions.backends.cache",
+        "django.contrib.sessions.backends.cached_db",
+    ):
+        return []
+
+    cache_backend = settings.CACHES[getattr(settings, "SESSION_CACHE_ALIAS", "default")]["BACKEND"]
+    if cache_backend not in PROCESS_LOCAL_CACHE_BACKENDS:
+        return []
+
+    return [
+        checks.Error(
+            f"{settings.SESSION_ENGINE} sessions can't use the per-process cache {cache_backend}.",
+            hint="Point CACHE_URL at a shared cache (e.g. redis://...) or set SESSION_BACKEND=db.",
+            id="foundation.E001",
+        )
+    ]
+
+
+# The admin's middleware checks (silenced in settings), applied to `STATEFUL_MIDDLEWARE` instead
+ADMIN_STATEFUL_MIDDLEWARE = (
+    ("django.contrib.sessions.middleware.SessionMiddleware", "foundation.E002"),
+    ("django.contrib.auth.middleware.AuthenticationMiddleware", "foundation.E003"),
+    ("django.contrib.messages.middleware.MessageMiddleware", "foundation.E004"),
+)
+
+
+@checks.register(checks.Tags.admin)
+def check_stateful_middleware(app_configs, **kwargs):
+    "The admin needs sessions, auth and messages from the chain `StatefulPathsMiddleware` runs."
+
+    if "foundation.middleware.StatefulPathsMiddleware" not in settings.MIDDLEWARE:
+        return []
+
+    stateful_middleware = [import_string(path) for path in settings.STATEFUL_MIDDLEWARE]
+    errors = []
+    for required_path, error_id in ADMIN_STATEFUL_MIDDLEWARE:
+        required_middleware = import_string(required_path)
+        if not any(issubclass(middleware, required_middleware) for middleware in stateful_middleware):
+            errors.append(
+                checks.Error(
+                    f"'{required_path}' must be in STATEFUL_MIDDLEWARE in order to use the admin application.",
+                    id=error_id,
+                )
+            )
+    return errors
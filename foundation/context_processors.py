@@ -0,0 +1,17 @@
+from django.conf import settings
+
+
+is_env_prod = getattr(settings, "ENV") == "prod"
+
+
+# Computed once per process, the admin's base template reads it on every page
+ADMIN_BRANDING = {
+    "primary_color": "#5F71DA" if is_env_prod else "#79aec8",
+    "secondary_color": "#2A3990" if is_env_prod else "#417690",
+}
+
+
+def admin_branding(request):
+    "Exposes the per `SERVER_ENV` admin colors to templates as `admin_branding`."
+
+    return {"admin_branding": ADMIN_BRANDING}
@@ -0,0 +1,2 @@
+from .log_error import *
+from .utils import *
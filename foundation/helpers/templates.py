@@ -0,0 +1,29 @@
+from django.template.loader import get_template
+
+
+# Templates (and their `extends`/`include` chains) used by the admin's common pages
+ADMIN_TEMPLATES = (
+    "admin/index.html",
+    "admin/login.html",
+    "admin/change_list.html",
+    "admin/change_list_results.html",
+    "admin/change_list_object_tools.html",
+    "admin/actions.html",
+    "admin/filter.html",
+    "admin/search_form.html",
+    "admin/pagination.html",
+    "admin/date_hierarchy.html",
+    "admin/change_form.html",
+    "admin/change_form_object_tools.html",
+    "admin/includes/fieldset.html",
+    "admin/prepopulated_fields_js.html",
+    "admin/submit_line.html",
+    "admin/delete_confirmation.html",
+)
+
+
+def precompile_templates(template_names=ADMIN_TEMPLATES):
+    "Compiles templates into the cached loader, so a worker's first requests don't pay for it."
+
+    for template_name in template_names:
+        get_template(template_name)
@@ -0,0 +1,88 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework_simplejwt.settings import api_settings
+
+
+class TokenRevocationList:
+    """
+    Per-worker, in-memory copy of the revoked access token ids stored in `RevokedToken`.
+    Revoked refresh tokens stay in the DB only: they're presented once per rotation, when the
+    unique `jti` insert in `revoke` already rejects them.
+
+    Checking a token is a set lookup. The DB is only queried when the copy is older than
+    `settings.TOKEN_REVOCATION_REFRESH_INTERVAL` seconds, and then only for the rows created since
+    the previous sync minus `settings.TOKEN_REVOCATION_SYNC_MARGIN` seconds. The overlap picks up
+    rows committed after a later one was already read (ids and `created_at` aren't in commit order).
+    Tokens revoked on another worker are therefore honoured after at most one refresh interval;
+    tokens revoked on this worker are honoured immediately.
+    """
+
+    def __init__(self):
+        self._expiry_by_jti = {}
+        self._synced_at = None
+        self._next_refresh_at = 0
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti):
+        if time.monotonic() >= self._next_refresh_at:
+            self.refresh()
+        return jti in self._expiry_by_jti
+
+    def revoke(self, token, user=None):
+        """
+        Revokes a validated simplejwt token until its own expiry.
+        Returns False if the token was already revoked, which the unique `jti` makes race free.
+        """
+
+        from foundation.models import RevokedToken, TokenType
+
+        jti = token[api_settings.JTI_CLAIM]
+        token_type = token[api_settings.TOKEN_TYPE_CLAIM]
+        expires_at = datetime.fromtimestamp(token["exp"], tz=timezone.utc)
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(
+                    jti=jti, token_type=token_type, user=user, expires_at=expires_at
+                )
+        except IntegrityError:
+            revoked = False  # Already in the DB, make sure this worker knows about it too
+        else:
+            revoked = True
+
+        if token_type == TokenType.ACCESS.value:
+            # Under the lock, or a concurrent `refresh` would replace the dict without it
+            with self._lock:
+                self._expiry_by_jti[jti] = expires_at.timestamp()
+        return revoked
+
+    def refresh(self):
+        from foundation.models import RevokedToken, TokenType
+
+        with self._lock:
+            if time.monotonic() < self._next_refresh_at:
+                return  # Another thread refreshed while we waited for the lock
+
+            now = datetime.now(tz=timezone.utc)
+            revoked_tokens = RevokedToken.objects.filter(
+                token_type=TokenType.ACCESS.value, expires_at__gt=now
+            )
+            if self._synced_at is not None:
+                sync_margin = timedelta(seconds=settings.TOKEN_REVOCATION_SYNC_MARGIN)
+                revoked_tokens = revoked_tokens.filter(created_at__gte=self._synced_at - sync_margin)
+
+            expiry_by_jti = dict(self._expiry_by_jti)
+            for jti, expires_at in revoked_tokens.values_list("jti", "expires_at"):
+                expiry_by_jti[jti] = expires_at.timestamp()
+            self._synced_at = now
+
+            self._expiry_by_jti = {
+                jti: expiry for jti, expiry in expiry_by_jti.items() if expiry > now.timestamp()
+            }
+            self._next_refresh_at = time.monotonic() + settings.TOKEN_REVOCATION_REFRESH_INTERVAL
+
+
+revoked_tokens = TokenRevocationList()
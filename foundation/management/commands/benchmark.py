@@ -0,0 +1,168 @@
+import logging
+import time
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from foundation.helpers.token_revocation import TokenRevocationList
+from foundation.models import RevokedToken
+
+
+class Command(BaseCommand):
+    help = "Micro benchmarks for the request hot paths, e.g. `python manage.py benchmark middleware`."
+
+    targets = ("middleware", "revocation", "admin")
+
+    def add_arguments(self, parser):
+        parser.add_argument("target", choices=self.targets)
+        parser.add_argument("-n", "--iterations", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        logging.getLogger("django.request").setLevel(logging.ERROR)  # No 4xx warning per request
+        getattr(self, f"bench_{options['target']}")(options["iterations"])
+
+    def report(self, label, elapsed, iterations, queries=None):
+        line = f"{label:<40} {elapsed / iterations * 1_000_000:>10.1f} us/op"
+        if queries is not None:
+            line += f" {queries / iterations:>6.2f} queries/op"
+        self.stdout.write(line)
+
+    def time_calls(self, func, iterations):
+        func()  # Warm up
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            for _ in range(iterations):
+                func()
+            elapsed = time.perf_counter() - start
+        return elapsed, len(ctx.captured_queries)
+
+    def time_requests(self, client, path, iterations, rounds=3, **extra):
+        "Best of `rounds` runs, so a noisy round doesn't decide the comparison."
+
+        client.get(path, **extra)  # Warm up (middleware chain is built on the first request)
+        results = []
+        for _ in range(rounds):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    client.get(path, **extra)
+                elapsed = time.perf_counter() - start
+            results.append((elapsed, len(ctx.captured_queries)))
+        return min(results)
+
+    def bench_middleware(self, iterations):
+        """
+        Compares `/api/me` with the baseline profile (full middleware chain, JWT then session then
+        basic auth) and the `STATELESS_API` profile, for anonymous and JWT authenticated requests.
+        The anonymous requests carry a session cookie, like a browser that also uses the admin.
+        """
+
+        profiles = (
+            (
+                "baseline",
+                (),
+                (
+                    "foundation.authentication.JWTAuthentication",
+                    "rest_framework.authentication.SessionAuthentication",
+                    "rest_framework.authentication.BasicAuthentication",
+                ),
+            ),
+            ("STATELESS_API", ("/api/",), ("foundation.authentication.JWTAuthentication",)),
+        )
+
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                email=f"benchmark-{uuid.uuid4().hex}@drf.com", password=None, name="Benchmark"
+            )
+            access_token = RefreshToken.for_user(user).access_token
+            cases = (
+                ("anonymous", {"HTTP_COOKIE": "sessionid=benchmark-session"}),
+                ("JWT", {"HTTP_AUTHORIZATION": f"Bearer {access_token}"}),
+            )
+
+            for case, headers in cases:
+                for profile, prefixes, authentication_classes in profiles:
+                    rest_framework = {
+                        **settings.REST_FRAMEWORK,
+                        "DEFAULT_AUTHENTICATION_CLASSES": authentication_classes,
+                    }
+                    with override_settings(
+                        STATELESS_PATH_PREFIXES=prefixes, REST_FRAMEWORK=rest_framework
+                    ), mock.patch.object(
+                        # Views read the default at import time, the override alone isn't enough
+                        APIView,
+                        "authentication_classes",
+                        api_settings.DEFAULT_AUTHENTICATION_CLASSES,
+                    ):
+                        elapsed, queries = self.time_requests(
+                            Client(), "/api/me", iterations, **headers
+                        )
+                    self.report(f"{case}, {profile}", elapsed, iterations, queries)
+
+            transaction.set_rollback(True)
+
+    def bench_revocation(self, iterations, revoked_count=10_000):
+        "Compares the in-memory revoked token check with a DB lookup per request."
+
+        with transaction.atomic():
+            expires_at = timezone.now() + timedelta(days=1)
+            RevokedToken.objects.bulk_create(
+                RevokedToken(jti=uuid.uuid4().hex, expires_at=expires_at) for _ in range(revoked_count)
+            )
+            jti = uuid.uuid4().hex  # Not revoked, so every check has to go all the way
+            revocation_list = TokenRevocationList()
+
+            checks = (
+                ("DB lookup per request", lambda: RevokedToken.objects.filter(jti=jti).exists()),
+                ("in-memory revocation list", lambda: revocation_list.is_revoked(jti)),
+            )
+            for label, check in checks:
+                elapsed, queries = self.time_calls(check, iterations)
+                self.report(label, elapsed, iterations, queries)
+
+            transaction.set_rollback(True)
+
+    def bench_admin(self, iterations):
+        "Compares the admin changelist render time with and without the cached template loader."
+
+        iterations = max(iterations // 10, 1)  # A changelist render is ~100x slower than the others
+        uncached_templates = [
+            {
+                **settings.TEMPLATES[0],
+                "OPTIONS": {
+                    **settings.TEMPLATES[0]["OPTIONS"],
+                    "loaders": [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                },
+            }
+        ]
+
+        with transaction.atomic():
+            admin_user = get_user_model().objects.create_superuser(
+                email=f"benchmark-{uuid.uuid4().hex}@drf.com", password=None, name="Benchmark"
+            )
+            client = Client()
+            client.force_login(admin_user)
+
+            for label, templates in (
+                ("uncached template loaders", uncached_templates),
+                ("cached template loader", settings.TEMPLATES),
+            ):
+                with override_settings(TEMPLATES=templates):
+                    elapsed, queries = self.time_requests(client, "/admin/foundation/user/", iterations)
+                self.report(label, elapsed, iterations, queries)
+
+            transaction.set_rollback(True)
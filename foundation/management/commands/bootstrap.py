@@ -0,0 +1,92 @@
+"""
+Container start-up tasks in a single Django process, each one skipped when there's nothing to do:
+- Applies migrations only if the migration graph has unapplied nodes.
+- Runs collectstatic only if the source static files changed since the last run.
+- Creates the default superuser only if it doesn't exist.
+"""
+
+import hashlib
+import os
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles.finders import get_finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+
+class Command(BaseCommand):
+    help = "Idempotent container start-up: migrate, collectstatic and create the default superuser."
+
+    static_fingerprint_file = "staticfiles.fingerprint"
+
+    def handle(self, *args, **options):
+        self.migrate()
+        self.collect_static()
+        self.create_superuser()
+
+    def migrate(self):
+        executor = MigrationExecutor(connections[DEFAULT_DB_ALIAS])
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        if not plan:
+            self.stdout.write("No pending migrations.")
+            return
+
+        self.stdout.write(f"Applying {len(plan)} migrations...")
+        call_command("migrate", interactive=False)
+
+    def collect_static(self):
+        fingerprint = self.get_static_fingerprint()
+        fingerprint_path = os.path.join(settings.STATIC_ROOT, self.static_fingerprint_file)
+        manifest_path = os.path.join(settings.STATIC_ROOT, "staticfiles.json")
+
+        if os.path.exists(manifest_path) and os.path.exists(fingerprint_path):
+            with open(fingerprint_path) as fingerprint_file:
+                if fingerprint_file.read() == fingerprint:
+                    self.stdout.write("Static files are up to date.")
+                    return
+
+        call_command("collectstatic", interactive=False, verbosity=0)
+        with open(fingerprint_path, "w") as fingerprint_file:
+            fingerprint_file.write(fingerprint)
+        self.stdout.write("Collected static files.")
+
+    def get_static_fingerprint(self):
+        "Hash of the path and content of every static file collectstatic would copy."
+
+        ignore_patterns = apps.get_app_config("staticfiles").ignore_patterns
+        files = {}
+        for finder in get_finders():
+            for path, storage in finder.list(ignore_patterns):
+                prefixed_path = os.path.join(getattr(storage, "prefix", None) or "", path)
+                # First finder wins, like collectstatic
+                files.setdefault(prefixed_path, (path, storage))
+
+        digest = hashlib.sha256(settings.STORAGES["staticfiles"]["BACKEND"].encode())
+        for prefixed_path, (path, storage) in sorted(files.items()):
+            digest.update(prefixed_path.encode())
+            with storage.open(path) as static_file:
+                digest.update(hashlib.sha256(static_file.read()).digest())
+        return digest.hexdigest()
+
+    def create_superuser(self):
+        email = os.getenv("DJANGO_SUPERUSER_EMAIL", "admin@drf.com")
+        password = os.getenv("DJANGO_SUPERUSER_PASSWORD")
+
+        if get_user_model().objects.filter(email=email).exists():
+            self.stdout.write(f"Superuser {email} already exists.")
+            return
+
+        if not password:
+            self.stdout.write(
+                self.style.WARNING("DJANGO_SUPERUSER_PASSWORD isn't set, skipping superuser.")
+            )
+            return
+
+        get_user_model().objects.create_superuser(
+            email=email, password=password, name="System Overlord"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Superuser {email} created."))
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from foundation.helpers import log_error
+from foundation.models import RevokedToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes revoked tokens past their expiry in small batches, an expired token is rejected"
+        " anyway. Use `--interval` to keep running as a scheduler (e.g. a sidecar container)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Seconds to wait between purges. Runs once when not set.",
+        )
+
+    def handle(self, *args, **options):
+        if not options["interval"]:
+            self.purge(options["batch_size"])
+            return
+
+        while True:
+            try:
+                self.purge(options["batch_size"])
+            except Exception as ex:
+                log_error("ERROR occurred in purge_revoked_tokens", ex)
+            finally:
+                # Don't keep an idle connection across the sleep, the DB or a proxy may drop it
+                connections.close_all()
+            time.sleep(options["interval"])
+
+    def purge(self, batch_size):
+        expired_tokens = RevokedToken.objects.filter(expires_at__lt=timezone.now())
+        total_deleted = 0
+        while True:
+            batch = list(expired_tokens.values_list("pk", flat=True)[:batch_size])
+            if not batch:
+                break
+            deleted, _ = RevokedToken.objects.filter(pk__in=batch).delete()
+            total_deleted += deleted
+
+        self.stdout.write(f"Purged {total_deleted} expired revoked tokens.")
@@ -0,0 +1,61 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from foundation.helpers import log_error
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes expired sessions in small batches, so the purge never holds long locks on"
+        " `django_session`. Use `--interval` to keep running as a scheduler (e.g. a sidecar container)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Seconds to wait between purges. Runs once when not set.",
+        )
+
+    def handle(self, *args, **options):
+        if not options["interval"]:
+            self.purge(options["batch_size"])
+            return
+
+        while True:
+            try:
+                self.purge(options["batch_size"])
+            except Exception as ex:
+                log_error("ERROR occurred in purge_sessions", ex)
+            finally:
+                # Don't keep an idle connection across the sleep, the DB or a proxy may drop it
+                connections.close_all()
+            time.sleep(options["interval"])
+
+    def purge(self, batch_size):
+        session_store = import_module(settings.SESSION_ENGINE).SessionStore
+
+        # Cache and signed cookie sessions expire on their own, there's no table to purge
+        if not hasattr(session_store, "get_model_class"):
+            session_store.clear_expired()
+            return
+
+        expired_sessions = session_store.get_model_class().objects.filter(
+            expire_date__lt=timezone.now()
+        )
+        total_deleted = 0
+        while True:
+            batch = list(expired_sessions.values_list("pk", flat=True)[:batch_size])
+            if not batch:
+                break
+            deleted, _ = expired_sessions.model.objects.filter(pk__in=batch).delete()
+            total_deleted += deleted
+
+        self.stdout.write(f"Purged {total_deleted} expired sessions.")
@@ -1,5 +1,12 @@
-from django.db import connections
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import connection, connections
+from django.http import JsonResponse
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.module_loading import import_string
 
 
 class QueryCountDebugMiddleware(MiddlewareMixin):
@@ -30,3 +37,178 @@ class QueryCountDebugMiddleware(MiddlewareMixin):
                     f" total {total_time} seconds {END}"
                 )
         return response
+
+
+class StatefulPathsMiddleware:
+    """
+    Runs the `settings.STATEFUL_MIDDLEWARE` chain (sessions, CSRF, auth, messages) only for
+    requests outside `settings.STATELESS_PATH_PREFIXES`.
+
+    The stateless API authenticates with JWT on every request, so loading the session (a DB
+    query), rotating CSRF cookies and setting up message storage is wasted work there, while
+    the admin still needs all of it. The wrapped middlewares are chained here exactly like
+    Django's handler would do it, and their `process_view`, `process_exception` and
+    `process_template_response` hooks are forwarded only for stateful requests.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.stateless_prefixes = tuple(getattr(settings, "STATELESS_PATH_PREFIXES", ()))
+
+        handler = get_response
+        middlewares = []
+        for middleware_path in reversed(settings.STATEFUL_MIDDLEWARE):
+            middleware = import_string(middleware_path)(handler)
+            middlewares.insert(0, middleware)
+            handler = middleware
+        self.stateful_handler = handler
+
+        self.view_hooks = [m.process_view for m in middlewares if hasattr(m, "process_view")]
+        self.exception_hooks = [
+            m.process_exception for m in reversed(middlewares) if hasattr(m, "process_exception")
+        ]
+        self.template_response_hooks = [
+            m.process_template_response
+            for m in reversed(middlewares)
+            if hasattr(m, "process_template_response")
+        ]
+
+    def is_stateless(self, request):
+        return request.path_info.startswith(self.stateless_prefixes)
+
+    def __call__(self, request):
+        if self.is_stateless(request):
+            return self.get_response(request)
+        return self.stateful_handler(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self.is_stateless(request):
+            return None
+        for hook in self.view_hooks:
+            response = hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    def process_exception(self, request, exception):
+        if self.is_stateless(request):
+            return None
+        for hook in self.exception_hooks:
+            response = hook(request, exception)
+            if response is not None:
+                return response
+        return None
+
+    def process_template_response(self, request, response):
+        if self.is_stateless(request):
+            return response
+        for hook in self.template_response_hooks:
+            response = hook(request, response)
+        return response
+
+
+class AdmissionControlMiddleware:
+    """
+    Sheds load per worker: answers 503 with `Retry-After` right away, instead of queueing work the
+    worker can't finish in time (e.g. password hashing on login) until the load balancer times out.
+
+    A request is rejected when, per `settings.ADMISSION_CONTROL`:
+    - the worker already has `MAX_IN_FLIGHT` requests (threaded workers),
+    - it waited more than `MAX_QUEUE_WAIT` seconds before reaching the worker, according to the
+      proxy's `X-Request-Start` header (sync workers queue in the socket backlog),
+    - or the median DB query time of the last `DB_LATENCY_WINDOW` seconds is above
+      `MAX_DB_LATENCY` seconds, with at least `MIN_DB_LATENCY_SAMPLES` queries in the window. A
+      few legitimately slow queries (admin counts, bulk inserts) don't move the median, and once
+      the window empties (e.g. while shedding) traffic resumes and re-measures it.
+    `EXEMPT_PATHS` (the health probes) are never rejected. Only the default DB is measured.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = settings.ADMISSION_CONTROL
+        self.exempt_paths = tuple(self.config["EXEMPT_PATHS"])
+        self.in_flight = 0
+        self.db_query_samples = deque(maxlen=1000)  # (end time, duration) of the latest queries
+        self.db_latency = None
+        self.db_latency_computed_at = 0.0
+        self.lock = threading.Lock()
+
+    def __call__(self, request):
+        if not request.path_info.startswith(self.exempt_paths):
+            rejection_reason = self.get_rejection_reason(request)
+            if rejection_reason:
+                response = JsonResponse(
+                    {"message": "Server is overloaded, please retry later."}, status=503
+                )
+                response["Retry-After"] = str(self.config["RETRY_AFTER"])
+                response["X-Rejected-By"] = rejection_reason
+                return response
+
+        with self.lock:
+            self.in_flight += 1
+        try:
+            with connection.execute_wrapper(self.time_query):
+                return self.get_response(request)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def get_rejection_reason(self, request):
+        if self.in_flight >= self.config["MAX_IN_FLIGHT"]:
+            return "in-flight"
+
+        queue_wait = self.get_queue_wait(request)
+        if queue_wait is not None and queue_wait > self.config["MAX_QUEUE_WAIT"]:
+            return "queue-wait"
+
+        db_latency = self.get_db_latency()
+        if db_latency is not None and db_latency > self.config["MAX_DB_LATENCY"]:
+            return "db-latency"
+
+        return None
+
+    def get_db_latency(self):
+        "Median query time over the window, recomputed at most once a second. None if too few queries."
+
+        now = time.monotonic()
+        if now - self.db_latency_computed_at < 1:
+            return self.db_latency
+
+        with self.lock:
+            window_start = now - self.config["DB_LATENCY_WINDOW"]
+            while self.db_query_samples and self.db_query_samples[0][0] < window_start:
+                self.db_query_samples.popleft()
+            durations = sorted(duration for _, duration in self.db_query_samples)
+
+        if len(durations) < self.config["MIN_DB_LATENCY_SAMPLES"]:
+            self.db_latency = None
+        else:
+            self.db_latency = durations[len(durations) // 2]
+        self.db_latency_computed_at = now
+        return self.db_latency
+
+    def get_queue_wait(self, request):
+        "Seconds since the proxy received the request, from `X-Request-Start: t=<epoch>`."
+
+        header = request.META.get("HTTP_X_REQUEST_START")
+        if not header:
+            return None
+
+        try:
+            started_at = float(header.removeprefix("t="))
+        except ValueError:
+            return None
+
+        # Proxies send seconds (nginx), milliseconds (Heroku) or microseconds (Apache)
+        while started_at > 1e11:
+            started_at /= 1000
+        return time.time() - started_at
+
+    def time_query(self, execute, sql, params, many, context):
+        start = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            end = time.monotonic()
+            with self.lock:
+                self.db_query_samples.append((end, end - start))
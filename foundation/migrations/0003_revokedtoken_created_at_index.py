@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-19 11:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("foundation", "0002_revokedtoken"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="revokedtoken",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1 on 2026-10-19 11:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("foundation", "0003_revokedtoken_created_at_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="revokedtoken",
+            name="token_type",
+            field=models.CharField(
+                choices=[("access", "ACCESS"), ("refresh", "REFRESH")], default="access", max_length=16
+            ),
+        ),
+    ]
@@ -1 +1,2 @@
 from .user import *  # (must be first)
+from .revoked_token import *
@@ -0,0 +1,35 @@
+from enum import Enum
+
+from django.conf import settings
+from django.db import models
+
+
+class TokenType(Enum):
+    ACCESS = "access"
+    REFRESH = "refresh"
+
+
+class RevokedToken(models.Model):
+    "JWTs revoked before their expiry (e.g. on logout), identified by their `jti` claim."
+
+    __REPR__ = ("id", "jti", "user_id")
+
+    jti = models.CharField(max_length=255, unique=True)
+    # Only access tokens are loaded in memory, refresh tokens are checked by the unique `jti` insert
+    token_type = models.CharField(
+        max_length=16,
+        choices=[(token_type.value, token_type.name) for token_type in TokenType],
+        default=TokenType.ACCESS.value,
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="revoked_tokens",
+    )
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True, editable=False, db_index=True)
+
+    def __str__(self):
+        return f"{self.jti} - {self.expires_at}"
@@ -7,6 +7,26 @@ class RegisterUserSerializer(serializers.Serializer):
     password = serializers.CharField(min_length=8, write_only=True)
 
 
+class RegisterUsersResultSerializer(serializers.Serializer):
+    "One item of the batch registration response, `data` has the single registration's shape."
+
+    status = serializers.IntegerField()
+    data = serializers.DictField()
+
+
 class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True)
+
+
+class RefreshTokenSerializer(serializers.Serializer):
+    refresh_token = serializers.CharField()
+
+
+class LogoutSerializer(serializers.Serializer):
+    refresh_token = serializers.CharField(required=False)
+
+
+class TokenPairSerializer(serializers.Serializer):
+    access_token = serializers.CharField()
+    refresh_token = serializers.CharField()
@@ -7,11 +7,12 @@ class UserSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = get_user_model()
-        fields = ["id", "email", "is_active", "age", "role", "created_at", "updated_at"]
+        fields = ["id", "email", "password", "is_active", "age", "role", "created_at", "updated_at"]
 
 
 class UserWithTokenSerializer(UserSerializer):
     access_token = serializers.CharField()
+    refresh_token = serializers.CharField()
 
     class Meta(UserSerializer.Meta):
-        fields = UserSerializer.Meta.fields + ["access_token"]
+        fields = UserSerializer.Meta.fields + ["access_token", "refresh_token"]
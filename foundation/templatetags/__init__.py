@@ -1 +0,0 @@
-from .custom_tags import primary_color, secondary_color  # NOQA
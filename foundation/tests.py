@@ -1,3 +1,394 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db import OperationalError
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from foundation.checks import check_session_cache, check_stateful_middleware
+from foundation.helpers.token_revocation import TokenRevocationList, revoked_tokens
+from foundation.middleware import AdmissionControlMiddleware
+from foundation.models import RevokedToken, TokenType
+from foundation.views import RegisterUsersAPIView
+
+
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@drf.com", password="password", name="Test User"
+        )
+        self.client = APIClient()
+
+    def test_revoked_access_token_is_rejected(self):
+        access_token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+        self.assertEqual(self.client.get(reverse("api.me")).status_code, 200)
+
+        # Revoked by another worker, this one sees it on its next sync
+        TokenRevocationList().revoke(access_token, user=self.user)
+        revoked_tokens._next_refresh_at = 0
+
+        response = self.client.get(reverse("api.me"))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["code"], "token_revoked")
+
+    def test_logout_revokes_access_token(self):
+        access_token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+
+        response = self.client.post(reverse("api.logout"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(RevokedToken.objects.filter(jti=access_token["jti"]).exists())
+
+        response = self.client.get(reverse("api.me"))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["code"], "token_revoked")
+
+    def test_logout_without_token_auth(self):
+        self.client.force_authenticate(user=self.user)  # Like session or basic auth: no token
+
+        response = self.client.post(reverse("api.logout"))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(RevokedToken.objects.exists())
+
+    def test_sync_picks_up_late_committed_revocations(self):
+        revocation_list = TokenRevocationList()
+        revocation_list.refresh()
+
+        # Created before the sync but committed after it, e.g. by a slow transaction
+        late_token = RevokedToken.objects.create(
+            jti="late-jti", expires_at=timezone.now() + timedelta(minutes=5)
+        )
+        RevokedToken.objects.filter(pk=late_token.pk).update(
+            created_at=timezone.now() - timedelta(seconds=30)
+        )
+
+        revocation_list._next_refresh_at = 0
+        self.assertTrue(revocation_list.is_revoked("late-jti"))
+
+    def test_expired_revocations_are_not_loaded(self):
+        RevokedToken.objects.create(jti="expired-jti", expires_at=timezone.now() - timedelta(minutes=5))
+
+        self.assertFalse(TokenRevocationList().is_revoked("expired-jti"))
+
+    def test_failed_revocation_is_not_cached(self):
+        revocation_list = TokenRevocationList()
+        access_token = RefreshToken.for_user(self.user).access_token
+
+        with mock.patch.object(
+            RevokedToken.objects, "create", side_effect=OperationalError("connection lost")
+        ):
+            with self.assertRaises(OperationalError):
+                revocation_list.revoke(access_token)
+        self.assertFalse(revocation_list.is_revoked(access_token["jti"]))
+
+    def test_already_revoked_token_is_cached(self):
+        revocation_list = TokenRevocationList()
+        revocation_list.refresh()
+        access_token = RefreshToken.for_user(self.user).access_token
+        TokenRevocationList().revoke(access_token)
+
+        self.assertFalse(revocation_list.revoke(access_token))
+        self.assertTrue(revocation_list.is_revoked(access_token["jti"]))
+
+
+class RefreshTokenTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@drf.com", password="password", name="Test User"
+        )
+        self.client = APIClient()
+
+    def refresh(self, refresh_token):
+        return self.client.post(reverse("api.refresh-token"), {"refresh_token": str(refresh_token)})
+
+    def test_login_returns_token_pair(self):
+        response = self.client.post(
+            reverse("api.login"), {"email": "USER@drf.com", "password": "password"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access_token", response.json())
+        self.assertIn("refresh_token", response.json())
+
+    def test_refresh_rotates_token(self):
+        refresh_token = RefreshToken.for_user(self.user)
+
+        response = self.refresh(refresh_token)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.json()["refresh_token"], str(refresh_token))
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.json()['access_token']}")
+        self.assertEqual(self.client.get(reverse("api.me")).status_code, 200)
+
+        revoked_token = RevokedToken.objects.get(jti=refresh_token["jti"])
+        self.assertEqual(revoked_token.token_type, TokenType.REFRESH.value)
+        self.assertFalse(TokenRevocationList().is_revoked(refresh_token["jti"]))  # DB only
+
+    def test_rotated_refresh_token_replay_is_rejected(self):
+        refresh_token = RefreshToken.for_user(self.user)
+        self.assertEqual(self.refresh(refresh_token).status_code, 200)
+
+        response = self.refresh(refresh_token)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["message"], "Refresh token is invalid or expired.")
+
+    def test_access_token_as_refresh_token_is_rejected(self):
+        access_token = RefreshToken.for_user(self.user).access_token
+
+        self.assertEqual(self.refresh(access_token).status_code, 401)
+
+    def test_inactive_user_cannot_refresh(self):
+        refresh_token = RefreshToken.for_user(self.user)
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+
+        self.assertEqual(self.refresh(refresh_token).status_code, 401)
+
+    def test_logout_revokes_access_and_refresh_tokens(self):
+        refresh_token = RefreshToken.for_user(self.user)
+        access_token = refresh_token.access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+
+        response = self.client.post(reverse("api.logout"), {"refresh_token": str(refresh_token)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(reverse("api.me")).status_code, 401)
+
+        self.client.credentials()
+        self.assertEqual(self.refresh(refresh_token).status_code, 401)
+
+    def test_purge_revoked_tokens_deletes_expired_rows(self):
+        now = timezone.now()
+        RevokedToken.objects.create(jti="expired-jti", expires_at=now - timedelta(minutes=5))
+        RevokedToken.objects.create(jti="live-jti", expires_at=now + timedelta(minutes=5))
+
+        call_command("purge_revoked_tokens", batch_size=1, stdout=StringIO())
+
+        self.assertEqual(list(RevokedToken.objects.values_list("jti", flat=True)), ["live-jti"])
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class RegisterUsersTests(TestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@drf.com", password="password", name="Admin"
+        )
+        get_user_model().objects.create_user(
+            email="existing@drf.com", password="password", name="Existing"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def register(self, users):
+        return self.client.post(reverse("api.register-users"), users, format="json")
+
+    def user_data(self, email):
+        return {"email": email, "name": "New User", "password": "password"}
+
+    def test_per_item_results(self):
+        with mock.patch("foundation.views.auth.make_password", wraps=make_password) as hasher:
+            response = self.register(
+                [
+                    self.user_data("New@drf.com"),
+                    self.user_data("new@DRF.com"),
+                    self.user_data("EXISTING@drf.com"),
+                    {"email": "invalid", "name": "New User", "password": "password"},
+                ]
+            )
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        self.assertEqual([result["status"] for result in results], [201, 409, 409, 400])
+        self.assertEqual(results[0]["data"]["email"], "new@drf.com")
+        self.assertIn("refresh_token", results[0]["data"])
+        self.assertEqual(results[2]["data"], {"message": "A user with that email already exists!"})
+        self.assertEqual(results[3]["data"], {"errors": {"email": "Enter a valid email address."}})
+
+        # Only the user actually created had its password hashed
+        self.assertEqual(hasher.call_count, 1)
+        self.assertTrue(get_user_model().objects.get(email="new@drf.com").check_password("password"))
+
+    def test_concurrently_registered_email_is_a_conflict(self):
+        # The email is taken between the existence check and the insert
+        existing_emails = [set(), {"existing@drf.com"}]
+        with mock.patch.object(
+            RegisterUsersAPIView, "get_existing_emails", side_effect=existing_emails
+        ):
+            response = self.register(
+                [self.user_data("existing@drf.com"), self.user_data("new@drf.com")]
+            )
+
+        self.assertEqual([result["status"] for result in response.json()], [409, 201])
+        self.assertTrue(get_user_model().objects.filter(email="new@drf.com").exists())
+
+    def test_expects_a_list(self):
+        self.assertEqual(self.register(self.user_data("new@drf.com")).status_code, 400)
+        self.assertEqual(self.register([]).status_code, 400)
+
+    def test_batch_size_is_capped(self):
+        users = [
+            self.user_data(f"user{index}@drf.com")
+            for index in range(settings.REGISTER_USERS_MAX_BATCH_SIZE + 1)
+        ]
+
+        self.assertEqual(self.register(users).status_code, 400)
+
+    def test_requires_staff_user(self):
+        self.client.force_authenticate(user=get_user_model().objects.get(email="existing@drf.com"))
+
+        self.assertEqual(self.register([self.user_data("new@drf.com")]).status_code, 403)
+
+
+class AdmissionControlTests(TestCase):
+    def setUp(self):
+        self.middleware = AdmissionControlMiddleware(lambda request: HttpResponse("ok"))
+        self.request_factory = RequestFactory()
+
+    def record_queries(self, duration, count):
+        for _ in range(count):
+            self.middleware.time_query(lambda *args: time.sleep(duration), "", None, False, {})
+        self.middleware.db_latency_computed_at = 0  # Recompute on the next request
+
+    def test_single_slow_query_does_not_shed(self):
+        self.record_queries(0, 30)
+        now = time.monotonic()
+        with mock.patch("time.monotonic", side_effect=[now, now + 3]):  # One 3 second query
+            self.record_queries(0, 1)
+
+        self.assertEqual(self.middleware(self.request_factory.get("/api/me")).status_code, 200)
+
+    def test_sustained_slow_queries_shed_until_window_lapses(self):
+        with override_settings(
+            ADMISSION_CONTROL={**settings.ADMISSION_CONTROL, "MAX_DB_LATENCY": 0.001}
+        ):
+            self.middleware = AdmissionControlMiddleware(lambda request: HttpResponse("ok"))
+            self.record_queries(0.002, 30)
+
+            response = self.middleware(self.request_factory.get("/api/me"))
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response["Retry-After"], "1")
+            self.assertEqual(self.middleware(self.request_factory.get("/healthz")).status_code, 200)
+
+            window = settings.ADMISSION_CONTROL["DB_LATENCY_WINDOW"]
+            with mock.patch("time.monotonic", return_value=time.monotonic() + window + 1):
+                response = self.middleware(self.request_factory.get("/api/me"))
+            self.assertEqual(response.status_code, 200)
+
+    def test_long_queue_wait_sheds(self):
+        request_start = f"t={int((time.time() - 10) * 1000)}"  # Milliseconds, 10 seconds ago
+
+        response = self.middleware(
+            self.request_factory.get("/api/me", HTTP_X_REQUEST_START=request_start)
+        )
+        self.assertEqual(response.status_code, 503)
+
+    def test_rejection_has_cors_headers(self):
+        request_start = f"t={int((time.time() - 10) * 1000)}"
+
+        response = self.client.get(
+            reverse("api.me"), HTTP_ORIGIN="https://app.drf.com", HTTP_X_REQUEST_START=request_start
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Access-Control-Allow-Origin", response)
+
+
+class SessionCacheCheckTests(TestCase):
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cached_db")
+    def test_cached_sessions_in_process_local_cache_fail(self):
+        errors = check_session_cache(None)
+        self.assertEqual([error.id for error in errors], ["foundation.E001"])
+
+    @override_settings(
+        SESSION_ENGINE="django.contrib.sessions.backends.cache",
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}},
+    )
+    def test_cached_sessions_in_shared_cache_pass(self):
+        self.assertEqual(check_session_cache(None), [])
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.db")
+    def test_db_sessions_pass(self):
+        self.assertEqual(check_session_cache(None), [])
+
+
+# Admin pages are rendered without running collectstatic, so there's no manifest to look up
+@override_settings(
+    STORAGES={
+        **settings.STORAGES,
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    }
+)
+class StatefulPathsMiddlewareTests(TestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@drf.com", password="password", name="Admin"
+        )
+        self.client = Client(enforce_csrf_checks=True)
+
+    def admin_login(self):
+        self.client.get(reverse("admin:login"))
+        return self.client.post(
+            reverse("admin:login"),
+            {
+                "username": "admin@drf.com",
+                "password": "password",
+                "csrfmiddlewaretoken": self.client.cookies["csrftoken"].value,
+            },
+        )
+
+    def test_api_skips_sessions_and_csrf(self):
+        access_token = RefreshToken.for_user(self.admin).access_token
+
+        response = self.client.get(reverse("api.me"), HTTP_AUTHORIZATION=f"Bearer {access_token}")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(hasattr(response.wsgi_request, "session"))
+        self.assertNotIn("csrftoken", response.cookies)
+
+        response = self.client.post(
+            reverse("api.login"), {"email": "admin@drf.com", "password": "password"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("csrftoken", response.cookies)
+        self.assertNotIn("sessionid", response.cookies)
+
+    def test_admin_keeps_sessions_and_csrf(self):
+        response = self.client.get(reverse("admin:login"))
+        self.assertTrue(hasattr(response.wsgi_request, "session"))
+        self.assertIn("csrftoken", response.cookies)
+
+        response = self.client.post(
+            reverse("admin:login"), {"username": "admin@drf.com", "password": "password"}
+        )
+        self.assertEqual(response.status_code, 403)  # No CSRF token
+
+    def test_admin_login_and_logout(self):
+        response = self.admin_login()
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.client.get(reverse("admin:index")).status_code, 200)
+
+        response = self.client.post(
+            reverse("admin:logout"),
+            {"csrfmiddlewaretoken": self.client.cookies["csrftoken"].value},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(reverse("admin:index")).status_code, 302)
+
+    @override_settings(STATELESS_PATH_PREFIXES=())
+    def test_full_chain_without_stateless_prefixes(self):
+        response = self.client.get(reverse("api.me"))
+        self.assertTrue(hasattr(response.wsgi_request, "session"))
+        self.assertTrue(hasattr(response.wsgi_request, "_messages"))
+
+    def test_stateful_middleware_check(self):
+        self.assertEqual(check_stateful_middleware(None), [])
+
+        with override_settings(STATEFUL_MIDDLEWARE=settings.STATEFUL_MIDDLEWARE[:2]):
+            errors = check_stateful_middleware(None)
+        self.assertEqual([error.id for error in errors], ["foundation.E003", "foundation.E004"])
@@ -1 +1,2 @@
 from .auth import *
+from .health import *
@@ -1,18 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
 from django.contrib.auth import authenticate, get_user_model
-from django.contrib.auth.signals import user_logged_in
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db import IntegrityError, transaction
 from drf_spectacular.utils import extend_schema
 from rest_framework import exceptions, status
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken, Token
 
 from foundation.helpers import log_error
-from foundation.serializers.auth import LoginSerializer, RegisterUserSerializer
+from foundation.helpers.token_revocation import revoked_tokens
+from foundation.serializers.auth import (
+    LoginSerializer,
+    LogoutSerializer,
+    RefreshTokenSerializer,
+    RegisterUserSerializer,
+    RegisterUsersResultSerializer,
+    TokenPairSerializer,
+)
 from foundation.serializers.shared import ErrRespSerializer, ValidationErrSerializer
 from foundation.serializers.user import UserSerializer, UserWithTokenSerializer
 
 
+# Shared by every batch registration of this worker, so concurrent requests don't multiply threads
+password_hashing_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASHING_THREADS, thread_name_prefix="password-hashing"
+)
+
+
+def get_token_pair(user):
+    "Returns a fresh access and refresh token pair for the user."
+
+    refresh_token = RefreshToken.for_user(user)
+    return {"access_token": str(refresh_token.access_token), "refresh_token": str(refresh_token)}
+
+
 class RegisterUserAPIView(APIView):
     permission_classes = (AllowAny,)
 
@@ -45,11 +73,13 @@ class RegisterUserAPIView(APIView):
                 )
 
             user = get_user_model().objects.create_user(**validated_data)
-            access_token = RefreshToken.for_user(user).access_token
+
+            tokens = get_token_pair(user)
+            user.access_token, user.refresh_token = tokens["access_token"], tokens["refresh_token"]
 
             user_logged_in.send(sender=user.__class__, request=request, user=user)
             return Response(
-                UserWithTokenSerializer({"access_token": str(access_token), "user": user}).data,
+                UserWithTokenSerializer(user).data,
                 status=status.HTTP_201_CREATED,
             )
 
@@ -63,6 +93,140 @@ class RegisterUserAPIView(APIView):
             )
 
 
+class RegisterUsersAPIView(APIView):
+    """
+    Registers a list of users in one request, for partner integrations provisioning accounts.
+
+    Every item is validated like `RegisterUserAPIView` does, and gets a result with the same status
+    and body that endpoint would return (201, 400 or 409). Existing emails are found with a single
+    query, then only the new users' passwords are hashed (in parallel) and they're inserted in one
+    transaction.
+    """
+
+    permission_classes = (IsAdminUser,)
+    # About 0.35s of CPU per PBKDF2 hash: a full batch must fit in gunicorn's 30s worker timeout
+    # even on a single vCPU
+    max_batch_size = settings.REGISTER_USERS_MAX_BATCH_SIZE
+
+    @extend_schema(
+        request=RegisterUserSerializer(many=True),
+        responses={
+            200: RegisterUsersResultSerializer(many=True),
+            400: ValidationErrSerializer,
+            500: ErrRespSerializer,
+        },
+    )
+    def post(self, request):
+        try:
+            if not isinstance(request.data, list) or not 0 < len(request.data) <= self.max_batch_size:
+                return Response(
+                    ValidationErrSerializer(
+                        {
+                            "errors": {
+                                "non_field_errors": f"Expected a list of 1 to {self.max_batch_size} users."
+                            }
+                        }
+                    ).data,
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            serializer = RegisterUserSerializer(data=request.data, many=True)
+            results = [None] * len(request.data)
+            valid_items = {}  # index -> validated data, first occurrence of each email only
+            seen_emails = set()
+
+            for index, item in enumerate(request.data):
+                try:
+                    validated_data = serializer.run_child_validation(item)
+                except exceptions.ValidationError as ex:
+                    validation_errors = {field: errors[0] for field, errors in ex.detail.items()}
+                    results[index] = {
+                        "status": status.HTTP_400_BAD_REQUEST,
+                        "data": ValidationErrSerializer({"errors": validation_errors}).data,
+                    }
+                    continue
+
+                email = validated_data["email"].lower()
+                if email in seen_emails:
+                    results[index] = self.conflict_result()
+                    continue
+
+                seen_emails.add(email)
+                valid_items[index] = {**validated_data, "email": email}
+
+            # Checked before hashing, so existing users (e.g. re-provisioned ones) cost no hash
+            existing_emails = self.get_existing_emails(seen_emails)
+            for index, data in list(valid_items.items()):
+                if data["email"] in existing_emails:
+                    results[index] = self.conflict_result()
+                    del valid_items[index]
+
+            # Hashing dominates the request, hashlib releases the GIL so threads run it in parallel
+            hashed_passwords = password_hashing_executor.map(
+                make_password, [data["password"] for data in valid_items.values()]
+            )
+            new_users = {
+                index: get_user_model()(**{**data, "password": hashed_password})
+                for (index, data), hashed_password in zip(valid_items.items(), hashed_passwords)
+            }
+
+            created_users = self.create_users(new_users)
+
+            for index, user in new_users.items():
+                if index not in created_users:
+                    results[index] = self.conflict_result()
+                    continue
+
+                tokens = get_token_pair(user)
+                user.access_token, user.refresh_token = tokens["access_token"], tokens["refresh_token"]
+                results[index] = {
+                    "status": status.HTTP_201_CREATED,
+                    "data": UserWithTokenSerializer(user).data,
+                }
+
+            return Response(results, status=status.HTTP_200_OK)
+
+        except Exception as ex:
+            log_error("ERROR occurred in RegisterUsersAPIView", ex)
+            return Response(
+                ErrRespSerializer(
+                    {"message": "Some error occurred. Please contact administrator."}
+                ).data,
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+    def get_existing_emails(self, emails):
+        return set(get_user_model().objects.filter(email__in=emails).values_list("email", flat=True))
+
+    def create_users(self, new_users):
+        """
+        Inserts the users in one transaction, returns the indexes of the ones created.
+        If a concurrent registration took one of the emails since it was checked, that user is
+        dropped and the insert retried once.
+        """
+
+        users_to_create = new_users
+        for attempt in range(2):
+            try:
+                with transaction.atomic():
+                    get_user_model().objects.bulk_create(users_to_create.values())
+                return users_to_create
+            except IntegrityError:
+                if attempt:
+                    raise
+
+            existing_emails = self.get_existing_emails(user.email for user in new_users.values())
+            users_to_create = {
+                index: user for index, user in new_users.items() if user.email not in existing_emails
+            }
+
+    def conflict_result(self):
+        return {
+            "status": status.HTTP_409_CONFLICT,
+            "data": ErrRespSerializer({"message": "A user with that email already exists!"}).data,
+        }
+
+
 class LoginAPIView(APIView):
     permission_classes = (AllowAny,)
 
@@ -82,11 +246,10 @@ class LoginAPIView(APIView):
                     status=status.HTTP_401_UNAUTHORIZED,
                 )
 
-            access_token = RefreshToken.for_user(user).access_token
             user_logged_in.send(sender=user.__class__, request=request, user=user)
             return Response(
                 {
-                    "access_token": str(access_token),
+                    **get_token_pair(user),
                     "data": UserSerializer(user).data,
                 },
                 status=status.HTTP_200_OK,
@@ -103,6 +266,107 @@ class LoginAPIView(APIView):
             )
 
 
+class RefreshTokenAPIView(APIView):
+    """
+    Rotates a refresh token: the one sent is revoked and a new access/refresh pair is returned.
+    Needs no password hash and a single indexed user lookup, so clients can keep access tokens
+    short-lived. Reusing a rotated refresh token is rejected.
+    """
+
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
+
+    @extend_schema(
+        request=RefreshTokenSerializer,
+        responses={
+            200: TokenPairSerializer,
+            400: ValidationErrSerializer,
+            401: ErrRespSerializer,
+            500: ErrRespSerializer,
+        },
+    )
+    def post(self, request):
+        try:
+            serializer = RefreshTokenSerializer(data=request.data)
+            if not serializer.is_valid():
+                validation_errors = {field: errors[0] for field, errors in serializer.errors.items()}
+                return Response(
+                    ValidationErrSerializer({"errors": validation_errors}).data,
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            invalid_token_response = Response(
+                ErrRespSerializer({"message": "Refresh token is invalid or expired."}).data,
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+            try:
+                refresh_token = RefreshToken(serializer.validated_data["refresh_token"])
+            except TokenError:
+                return invalid_token_response
+
+            user = (
+                get_user_model()
+                .objects.filter(
+                    **{api_settings.USER_ID_FIELD: refresh_token[api_settings.USER_ID_CLAIM]},
+                    is_active=True,
+                )
+                .first()
+            )
+            # `revoke` fails when the token was rotated or revoked on logout before (e.g. a replay)
+            if not user or not revoked_tokens.revoke(refresh_token, user=user):
+                return invalid_token_response
+
+            return Response(TokenPairSerializer(get_token_pair(user)).data, status=status.HTTP_200_OK)
+
+        except Exception as ex:
+            log_error("ERROR occurred in RefreshTokenAPIView", ex)
+            return Response(
+                ErrRespSerializer(
+                    {"message": "Some error occurred. Please contact administrator."}
+                ).data,
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+class LogoutAPIView(APIView):
+    "Revokes the access token used for the request, and the refresh token if one is sent."
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(request=LogoutSerializer, responses={200: ErrRespSerializer})
+    def post(self, request):
+        try:
+            serializer = LogoutSerializer(data=request.data)
+            serializer.is_valid()
+
+            # Session or basic authenticated requests (STATELESS_API=false) have no token to revoke
+            if isinstance(request.auth, Token):
+                revoked_tokens.revoke(request.auth, user=request.user)
+
+            raw_refresh_token = serializer.validated_data.get("refresh_token")
+            if raw_refresh_token:
+                try:
+                    refresh_token = RefreshToken(raw_refresh_token)
+                except TokenError:
+                    refresh_token = None  # Expired or invalid, can't be used anyway
+
+                if refresh_token and refresh_token[api_settings.USER_ID_CLAIM] == getattr(
+                    request.user, api_settings.USER_ID_FIELD
+                ):
+                    revoked_tokens.revoke(refresh_token, user=request.user)
+
+            user_logged_out.send(sender=request.user.__class__, request=request, user=request.user)
+            return Response({"message": "Logged out successfully."}, status=status.HTTP_200_OK)
+
+        except Exception as ex:
+            log_error("ERROR occurred in LogoutAPIView", ex)
+            return Response(
+                {"message": "Some error occurred. Please contact administrator."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
 class LoggedInUserAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
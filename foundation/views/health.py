@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.http import JsonResponse
+
+from foundation.helpers import log_error
+
+
+# Per worker result of the last DB check, shared by the `/readyz` probes within the TTL
+readiness = {"is_ready": False, "checked_at": None}
+
+
+def liveness_view(request):
+    "Liveness probe, no I/O: answers as long as the worker can serve requests."
+
+    return JsonResponse({"status": "ok"})
+
+
+def readiness_view(request):
+    "Readiness probe, checks the DB at most once every `settings.READINESS_CHECK_TTL` seconds."
+
+    now = time.monotonic()
+    if readiness["checked_at"] is None or now - readiness["checked_at"] >= settings.READINESS_CHECK_TTL:
+        readiness["is_ready"] = is_db_reachable()
+        readiness["checked_at"] = now
+
+    if not readiness["is_ready"]:
+        return JsonResponse({"status": "unavailable"}, status=503)
+    return JsonResponse({"status": "ok"})
+
+
+def is_db_reachable():
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        return True
+
+    except Exception as ex:
+        log_error("ERROR occurred in readiness DB check", ex)
+        return False